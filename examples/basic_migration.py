@@ -9,17 +9,19 @@ from pathlib import Path
 # Добавляем src в путь
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
-from core.agent import MigrationAgent
-from core.config import Config
-from utils.logger import setup_logging
+# Тяжёлые импорты (агент тянет rich, bs4 и google-cloud) выполняются внутри
+# функций, чтобы запуск с --help или в неиспользуемом режиме был мгновенным.
 
 
 def main():
     """Пример полной миграции"""
-    
+    from core.agent import MigrationAgent
+    from core.config import Config
+    from utils.logger import setup_logging
+
     # Настройка логирования
     setup_logging("logs/example.log", "INFO")
-    
+
     try:
         # Загрузка конфигурации
         config = Config("config.yaml")
@@ -40,7 +42,10 @@ def main():
 
 def extract_only_example():
     """Пример только извлечения данных"""
-    
+    from core.agent import MigrationAgent
+    from core.config import Config
+    from utils.logger import setup_logging
+
     setup_logging("logs/extract_example.log", "INFO")
     
     try:
@@ -59,7 +64,10 @@ def extract_only_example():
 
 def deploy_only_example():
     """Пример только развертывания"""
-    
+    from core.agent import MigrationAgent
+    from core.config import Config
+    from utils.logger import setup_logging
+
     setup_logging("logs/deploy_example.log", "INFO")
     
     try:
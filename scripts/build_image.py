@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+One-shot builder for a pre-provisioned VM image.
+
+Boots a temporary instance with the startup script from the config, waits for
+provisioning to finish, snapshots the boot disk into an image family and
+deletes the instance. Subsequent deploys point `vm.custom_image` (or
+`image_family`) at the result and skip the whole apt-get phase at boot.
+"""
+
+import argparse
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.core.config import load_config
+
+IMAGE_FAMILY = 'deploy-web'
+
+
+def _run(command, capture=False):
+    print(f"$ {' '.join(command)}")
+    result = subprocess.run(command, check=True, text=True, capture_output=capture)
+    return result.stdout if capture else ''
+
+
+def build_image(config_path):
+    cfg = load_config(config_path).google_cloud
+    vm = cfg.vm
+    timestamp = time.strftime('%Y%m%d-%H%M%S')
+    build_vm = f"{vm.name}-imgbuild-{timestamp}"
+    image_name = f"{IMAGE_FAMILY}-{timestamp}"
+
+    startup_script = vm.get('startup_script')
+    if not startup_script and vm.get('startup_script_file'):
+        startup_script = Path(vm.startup_script_file).read_text(encoding='utf-8')
+    if not startup_script:
+        sys.exit("No vm.startup_script(_file) in config; nothing to bake into an image.")
+
+    with tempfile.NamedTemporaryFile('w', suffix='.sh', delete=False) as f:
+        # The baked script must signal completion so we know when to snapshot.
+        f.write(startup_script + '\ntouch /var/run/image-build-done\n')
+        script_path = f.name
+
+    common = ['--project', cfg.project_id, '--zone', cfg.zone]
+    _run(['gcloud', 'compute', 'instances', 'create', build_vm,
+          '--machine-type', vm.machine_type,
+          '--image-family', vm.image_family,
+          '--image-project', vm.image_project,
+          '--metadata-from-file', f'startup-script={script_path}',
+          *common])
+
+    keep_instance = False
+    try:
+        # Poll the guest for the completion sentinel; provisioning dominates
+        # this wait, so a coarse interval is fine here. The probe exits
+        # non-zero both while SSH is still coming up (255) and while the
+        # sentinel is absent (1) — that is the "not done yet" signal, not an
+        # error, so it must not go through _run's check=True.
+        for _ in range(60):
+            probe = subprocess.run(
+                ['gcloud', 'compute', 'ssh', build_vm, *common,
+                 '--command', 'test -f /var/run/image-build-done && echo DONE'],
+                capture_output=True, text=True)
+            if probe.returncode == 0 and 'DONE' in probe.stdout:
+                break
+            time.sleep(10)
+        else:
+            keep_instance = True
+            sys.exit("Provisioning did not finish in time; instance left for inspection.")
+
+        _run(['gcloud', 'compute', 'instances', 'stop', build_vm, *common])
+        _run(['gcloud', 'compute', 'images', 'create', image_name,
+              '--source-disk', build_vm,
+              '--source-disk-zone', cfg.zone,
+              '--family', IMAGE_FAMILY,
+              '--project', cfg.project_id])
+        print(f"Image '{image_name}' created in family '{IMAGE_FAMILY}'.")
+        print(f"Point google_cloud.vm.image_family at '{IMAGE_FAMILY}' "
+              f"(image_project: {cfg.project_id}) to use it.")
+    finally:
+        if not keep_instance:
+            _run(['gcloud', 'compute', 'instances', 'delete', build_vm, '--quiet', *common])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--config', '-c', default='config.yaml',
+                        help='Path to configuration file.')
+    args = parser.parse_args()
+    build_image(args.config)
@@ -1,7 +1,6 @@
 import sys
 from pathlib import Path
 from loguru import logger
-import json
 
 # Add project root to path to allow imports from src
 project_root = Path(__file__).parent.parent
@@ -10,6 +9,7 @@ sys.path.insert(0, str(project_root))
 from src.core.config import Config
 from src.extractors.tilda_extractor import TildaExtractor
 from src.processors.content_processor import ContentProcessor
+from src.utils.helpers import dump_json
 from src.utils.logger import setup_logging
 
 def test_processor():
@@ -55,8 +55,7 @@ def test_processor():
 
         # Save asset mapping
         asset_mapping_path = output_dir / "asset_mapping.json"
-        with asset_mapping_path.open('w', encoding='utf-8') as f:
-            json.dump(asset_mapping, f, indent=4, ensure_ascii=False)
+        dump_json(asset_mapping_path, asset_mapping)
         logger.info(f"🗺️ Saved asset mapping to: {asset_mapping_path}")
         
         logger.info("\n✅ Test finished successfully. Please inspect the files in `extracted_data/test_output`.")
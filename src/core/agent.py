@@ -2,31 +2,135 @@
 Main migration agent class
 """
 
+import base64
+import hashlib
 import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
 from typing import Optional
 from loguru import logger
-from rich.console import Console
-from rich.progress import Progress, SpinnerColumn, TextColumn
 
 from .config import load_config
-from ..extractors.tilda_extractor import TildaExtractor
-from ..processors.content_processor import ContentProcessor
-from ..deployers.google_cloud_deployer import GoogleCloudDeployer
+from ..utils.helpers import dump_json, iter_json_items, load_json
 # from ..form_handlers.form_handler import FormHandler # Пока не используется
 # from ..utils.logger import setup_logging # Пока не используется
 
+# Тяжёлые зависимости (rich, bs4, google-cloud) импортируются отложенно в
+# _load_components: импорт самого модуля агента остаётся дешёвым, а режимы,
+# которым не нужен весь стек (например, --help), за него не платят.
+Console = None
+Progress = None
+SpinnerColumn = None
+TextColumn = None
+TildaExtractor = None
+ContentProcessor = None
+GoogleCloudDeployer = None
+
+
+# Версия пайплайна обработки страниц: поднимается при изменении логики
+# ContentProcessor, чтобы сбросить кэш обработанных страниц.
+_PROCESSOR_VERSION = 1
+_PAGE_CACHE_FILE = Path("extracted_data") / ".page_cache.json"
+_PROCESSED_CACHE_FILE = Path("extracted_data") / ".processed_cache.json"
+
+
+def _page_hash(html: str) -> str:
+    return hashlib.blake2b(html.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def _input_state_digest(paths) -> str:
+    """Общий blake2b-дайджест содержимого входных файлов (в заданном порядке).
+
+    Файлы хэшируются мегабайтными кусками: assets.json может весить сотни
+    МБ, и читать его целиком ради дайджеста — тот самый пик памяти, от
+    которого уходит потоковый iter_json_items ниже по коду.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for path in paths:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                h.update(chunk)
+    return h.hexdigest()
+
+
+def _encode_cached_assets(assets: list) -> list:
+    """Кодирует бинарный content ресурсов в base64 для записи в JSON-кэш."""
+    encoded = []
+    for asset in assets:
+        content = asset.get('content')
+        if isinstance(content, bytes):
+            asset = {**asset,
+                     'content': base64.b64encode(content).decode('ascii'),
+                     'content_b64': True}
+        encoded.append(asset)
+    return encoded
+
+
+def _decode_cached_assets(assets: list) -> list:
+    """Обратное преобразование: возвращает content ресурсов обратно в bytes."""
+    for asset in assets:
+        if asset.pop('content_b64', False):
+            asset['content'] = base64.b64decode(asset['content'])
+    return assets
+
+
+def _load_components():
+    """Импортирует тяжёлые компоненты при первом создании агента."""
+    global Console, Progress, SpinnerColumn, TextColumn
+    global TildaExtractor, ContentProcessor, GoogleCloudDeployer
+    if Console is None:
+        from rich.console import Console as _Console
+        from rich.progress import (
+            Progress as _Progress,
+            SpinnerColumn as _SpinnerColumn,
+            TextColumn as _TextColumn,
+        )
+        Console, Progress = _Console, _Progress
+        SpinnerColumn, TextColumn = _SpinnerColumn, _TextColumn
+    if TildaExtractor is None:
+        from ..extractors.tilda_extractor import TildaExtractor as _TildaExtractor
+        TildaExtractor = _TildaExtractor
+    if ContentProcessor is None:
+        from ..processors.content_processor import ContentProcessor as _ContentProcessor
+        ContentProcessor = _ContentProcessor
+    if GoogleCloudDeployer is None:
+        from ..deployers.google_cloud_deployer import GoogleCloudDeployer as _GoogleCloudDeployer
+        GoogleCloudDeployer = _GoogleCloudDeployer
+
 
 class MigrationAgent:
     """
     Оркестрирует процесс миграции сайта с Tilda на Google Cloud.
     """
-    
+
+    # Console при создании пробует возможности терминала; одного экземпляра
+    # на процесс достаточно для всех агентов.
+    _console = None
+
     def __init__(self, config_path: str, dry_run: bool = False):
+        _load_components()
+        self.config_path = Path(config_path)
         self.config = load_config(config_path)
         self.dry_run = dry_run
-        self.console = Console()
-        
+        # mtime конфига на момент последней успешной проверки: повторные
+        # вызовы validate_configuration за один запуск не делают syscalls
+        # и сетевые проверки заново, пока файл не менялся.
+        self._validated_mtime = None
+        if MigrationAgent._console is None:
+            MigrationAgent._console = Console()
+        self.console = MigrationAgent._console
+
+        # Один Progress на весь запуск: каждый шаг добавляет свою задачу
+        # вместо создания и остановки отдельного live-дисплея с его потоком.
+        self._progress = Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            console=self.console
+        )
+        self._progress_active = False
+
+
         # Инъекция зависимостей для лучшей тестируемости
         self.extractor = TildaExtractor(self.config.tilda)
         self.processor = ContentProcessor(self.config.processing)
@@ -34,32 +138,54 @@ class MigrationAgent:
         # self.form_handler = FormHandler(self.config.forms) # Пока не используется
         
         # Migration state
+        self.state = {}
         self.extracted_data = None
         self.processed_data = None
         self.deployment_url = None
         
         logger.info(f"Migration Agent initialized. Dry run: {self.dry_run}")
         
-    def run(self):
+    # Полный цикл как декларативный конвейер: имя шага -> (метод, ключи
+    # state, которые шаг ожидает на входе). Шаги обмениваются данными через
+    # self.state, поэтому порядок можно менять и верхние шаги пропускать
+    # (from_step) без правки самого цикла.
+    PIPELINE = (
+        ('extract', '_extract', ()),
+        ('process', '_process', ('pages',)),
+        ('deploy', '_deploy', ()),
+    )
+
+    def run(self, from_step: Optional[str] = None):
         """
         Запускает полный цикл миграции: извлечение, обработка, развертывание.
+
+        Args:
+            from_step: Имя шага из PIPELINE, с которого начать. Артефакты
+                       пропущенных шагов должны быть заранее положены в
+                       self.state, иначе запуск завершается ValueError.
         """
+        if from_step is not None:
+            step_names = [name for name, _, _ in self.PIPELINE]
+            if from_step not in step_names:
+                raise ValueError(
+                    f"Unknown step '{from_step}'; expected one of {step_names}.")
         try:
             logger.info("Starting migration process...")
-            
-            # Шаг 1: Извлечение
-            pages_list = self._extract()
-            if not pages_list:
-                logger.warning("No pages found to process. Stopping migration.")
-                return
-
-            # Шаг 2: Обработка (пока в упрощенном виде)
-            # В будущем здесь будет цикл по всем страницам
-            page_to_process = self.extractor.get_page_full_export(pages_list[0]['id'])
-            processed_html = self._process(page_to_process)
-            
-            # Шаг 3: Развертывание
-            self._deploy(processed_html)
+            skipping = from_step is not None
+            for name, method_name, required_state in self.PIPELINE:
+                if skipping:
+                    if name != from_step:
+                        logger.info(f"Skipping step '{name}' (starting from '{from_step}').")
+                        continue
+                    skipping = False
+                    missing = [key for key in required_state if key not in self.state]
+                    if missing:
+                        raise ValueError(
+                            f"Cannot start from step '{name}': required state "
+                            f"{missing} was not produced (skipped steps must "
+                            f"seed it beforehand).")
+                if getattr(self, method_name)() is False:
+                    return
 
             logger.success("Migration process completed successfully!")
 
@@ -67,141 +193,193 @@ class MigrationAgent:
             logger.error(f"Migration failed: {e}", exc_info=True)
             raise
 
-    def _extract(self) -> list:
+    def _extract(self):
         """Извлекает список страниц с Tilda."""
         logger.info("Step 1: Extracting data from Tilda...")
         pages = self.extractor.get_pages_list()
         logger.info(f"Found {len(pages)} pages.")
-        return pages
+        if not pages:
+            logger.warning("No pages found to process. Stopping migration.")
+            return False
+        self.state['pages'] = pages
 
-    def _process(self, page_data: dict) -> str:
-        """Обрабатывает HTML-контент страницы."""
+    def _process(self):
+        """Обрабатывает HTML-контент страницы (пока только первой)."""
+        # В будущем здесь будет цикл по всем страницам
+        page_data = self.extractor.get_page_full_export(self.state['pages'][0]['id'])
         logger.info(f"Step 2: Processing content for page ID: {page_data['id']}...")
         html = self.processor.relativize_links(page_data['html'], self.config.tilda.base_url)
         html = self.processor.remove_tilda_elements(html)
         logger.info("Content processed.")
-        return html
-        
-    def _deploy(self, processed_content: str):
+        self.state['processed_html'] = html
+
+    def _deploy(self):
         """Развертывает обработанный контент."""
         logger.info("Step 3: Deploying to Google Cloud...")
         if not self.dry_run:
             self.deployer.create_vm_instance()
+            self.deployer.wait_for_vm_ready()
             # Здесь будет логика загрузки контента на созданную VM
             logger.info("VM creation initiated. Content deployment logic is pending.")
         else:
             logger.info("[DRY RUN] Skipping actual deployment.")
 
+    @contextmanager
+    def _step(self, description: str):
+        """
+        Контекст одного шага миграции поверх общего Progress.
+
+        Живой дисплей запускается только самым внешним шагом; вложенные шаги
+        лишь добавляют и убирают свои задачи.
+        """
+        outermost = not self._progress_active
+        if outermost:
+            self._progress.start()
+            self._progress_active = True
+        task = self._progress.add_task(description, total=None)
+        try:
+            yield lambda desc: self._progress.update(task, description=desc)
+        finally:
+            self._progress.remove_task(task)
+            if outermost:
+                self._progress.stop()
+                self._progress_active = False
+
     def validate_configuration(self):
         """Validate configuration and connections"""
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            console=self.console
-        ) as progress:
-            task = progress.add_task("Проверка конфигурации...", total=None)
-            
+        current_mtime = self.config_path.stat().st_mtime_ns
+        if current_mtime == self._validated_mtime:
+            logger.debug("Configuration unchanged since last validation, skipping.")
+            return
+
+        with self._step("Проверка конфигурации...") as update:
             # Validate config
             self.config.validate()
-            
+
             # Test Tilda API connection
             self.extractor.test_connection()
-            
+
             # Test Google Cloud connection
             self.deployer.test_connection()
-            
-            progress.update(task, description="✅ Конфигурация проверена")
-    
+
+            update("✅ Конфигурация проверена")
+
+        self._validated_mtime = current_mtime
+
     def extract_from_tilda(self):
         """Extract all data from Tilda"""
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            console=self.console
-        ) as progress:
-            task = progress.add_task("Извлечение данных с Tilda...", total=None)
-            
-            # Extract pages
-            pages = self.extractor.extract_pages()
-            progress.update(task, description=f"📄 Извлечено {len(pages)} страниц")
-            
-            # Extract assets
-            assets = self.extractor.extract_assets()
-            progress.update(task, description=f"📦 Извлечено {len(assets)} ресурсов")
-            
-            # Extract forms
-            forms = self.extractor.extract_forms()
-            progress.update(task, description=f"📝 Извлечено {len(forms)} форм")
-            
+        with self._step("Извлечение данных с Tilda...") as update:
+            # Страницы, ресурсы и формы приходят с независимых эндпоинтов
+            # Tilda, поэтому их можно запрашивать параллельно (I/O-bound).
+            if self.config.get('parallel_extract', True):
+                with ThreadPoolExecutor(max_workers=3) as executor:
+                    future_pages = executor.submit(self.extractor.extract_pages)
+                    future_assets = executor.submit(self.extractor.extract_assets)
+                    future_forms = executor.submit(self.extractor.extract_forms)
+                    pages = future_pages.result()
+                    assets = future_assets.result()
+                    forms = future_forms.result()
+            else:
+                pages = self.extractor.extract_pages()
+                assets = self.extractor.extract_assets()
+                forms = self.extractor.extract_forms()
+
+            update(f"📄 {len(pages)} страниц, 📦 {len(assets)} ресурсов, 📝 {len(forms)} форм")
+
             return {
                 'pages': pages,
                 'assets': assets,
                 'forms': forms
             }
-    
+
     def process_content(self):
         """Process extracted content"""
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            console=self.console
-        ) as progress:
-            task = progress.add_task("Обработка контента...", total=None)
-            
-            # Process pages
-            processed_pages = self.processor.process_pages(self.extracted_data['pages'])
-            progress.update(task, description="📄 Страницы обработаны")
-            
-            # Process assets
-            processed_assets = self.processor.process_assets(self.extracted_data['assets'])
-            progress.update(task, description="📦 Ресурсы обработаны")
-            
-            # Process forms
-            processed_forms = self.processor.process_forms(self.extracted_data['forms'])
-            progress.update(task, description="📝 Формы обработаны")
-            
+        with self._step("Обработка контента...") as update:
+            # Три стадии не зависят друг от друга — обрабатываем параллельно.
+            if self.config.get('parallel_extract', True):
+                with ThreadPoolExecutor(max_workers=3) as executor:
+                    future_pages = executor.submit(
+                        self._process_pages_cached, self.extracted_data['pages'])
+                    future_assets = executor.submit(
+                        self.processor.process_assets, self.extracted_data['assets'])
+                    future_forms = executor.submit(
+                        self.processor.process_forms, self.extracted_data['forms'])
+                    processed_pages = future_pages.result()
+                    processed_assets = future_assets.result()
+                    processed_forms = future_forms.result()
+            else:
+                processed_pages = self._process_pages_cached(self.extracted_data['pages'])
+                processed_assets = self.processor.process_assets(self.extracted_data['assets'])
+                processed_forms = self.processor.process_forms(self.extracted_data['forms'])
+
+            update("📄 Страницы, 📦 ресурсы и 📝 формы обработаны")
+
             return {
                 'pages': processed_pages,
                 'assets': processed_assets,
                 'forms': processed_forms
             }
-    
+
+    def _process_pages_cached(self, pages: list) -> list:
+        """
+        Обрабатывает страницы, пропуская не изменившиеся с прошлого запуска.
+
+        Кэш хранится в extracted_data/.page_cache.json как url -> (хэш
+        исходного HTML, обработанная страница) и сбрасывается при повышении
+        _PROCESSOR_VERSION.
+        """
+        try:
+            cache = load_json(_PAGE_CACHE_FILE)
+        except (OSError, ValueError):
+            cache = {}
+        if cache.get('version') != _PROCESSOR_VERSION:
+            cache = {'version': _PROCESSOR_VERSION, 'pages': {}}
+        cached_pages = cache['pages']
+
+        processed = [None] * len(pages)
+        misses = []
+        for i, page in enumerate(pages):
+            url = page.get('url', '')
+            content_hash = _page_hash(page.get('html', ''))
+            entry = cached_pages.get(url)
+            if entry and entry.get('hash') == content_hash:
+                processed[i] = entry['processed']
+            else:
+                misses.append((i, url, content_hash, page))
+
+        if misses:
+            fresh = self.processor.process_pages([page for _, _, _, page in misses])
+            for (i, url, content_hash, _), processed_page in zip(misses, fresh):
+                processed[i] = processed_page
+                cached_pages[url] = {'hash': content_hash, 'processed': processed_page}
+            try:
+                _PAGE_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+                dump_json(_PAGE_CACHE_FILE, cache, compress=True)
+            except OSError as e:
+                logger.warning(f"Could not persist page cache: {e}")
+
+        if len(misses) < len(pages):
+            logger.info(f"Page cache: {len(pages) - len(misses)} of {len(pages)} pages unchanged, skipped.")
+        return processed
+
     def deploy_to_google_cloud(self):
         """Deploy to Google Cloud"""
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            console=self.console
-        ) as progress:
-            task = progress.add_task("Развертывание на Google Cloud...", total=None)
-            
+        with self._step("Развертывание на Google Cloud...") as update:
             # New deployment flow
             deployment_url = self.deployer.run_deployment(self.processed_data)
-            progress.update(task, description="✅ Развертывание завершено")
-            
+            update("✅ Развертывание завершено")
+
             return deployment_url
-    
+
     def setup_forms(self):
         """Setup form handling (Now part of deployment)"""
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            console=self.console
-        ) as progress:
-            task = progress.add_task("Настройка обработки форм...", total=None)
-            
-            progress.update(task, description="✅ Настройка форм завершена")
-    
+        with self._step("Настройка обработки форм...") as update:
+            update("✅ Настройка форм завершена")
+
     def finalize_migration(self):
         """Finalize migration (Now part of deployment)"""
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            console=self.console
-        ) as progress:
-            task = progress.add_task("Финальная настройка...", total=None)
-            
-            progress.update(task, description="✅ Финальная настройка завершена")
+        with self._step("Финальная настройка...") as update:
+            update("✅ Финальная настройка завершена")
     
     def extract_only(self):
         """Only extract data from Tilda"""
@@ -215,16 +393,18 @@ class MigrationAgent:
             output_dir = Path("extracted_data")
             output_dir.mkdir(exist_ok=True)
             
-            # Save to files
-            import json
-            with open(output_dir / "pages.json", "w", encoding="utf-8") as f:
-                json.dump(self.extracted_data['pages'], f, ensure_ascii=False, indent=2)
-            
-            with open(output_dir / "assets.json", "w", encoding="utf-8") as f:
-                json.dump(self.extracted_data['assets'], f, ensure_ascii=False, indent=2)
-            
-            with open(output_dir / "forms.json", "w", encoding="utf-8") as f:
-                json.dump(self.extracted_data['forms'], f, ensure_ascii=False, indent=2)
+            # Save to files; три независимых файла, сериализация и запись
+            # перекрываются в потоках вместо последовательных блокировок на I/O.
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                futures = [
+                    executor.submit(dump_json, output_dir / name,
+                                    self.extracted_data[key], compress=True)
+                    for name, key in (("pages.json", 'pages'),
+                                      ("assets.json", 'assets'),
+                                      ("forms.json", 'forms'))
+                ]
+                for future in futures:
+                    future.result()
             
             self.console.print(f"[green]✅ Данные сохранены в папку {output_dir}[/green]")
             
@@ -239,27 +419,58 @@ class MigrationAgent:
         
         try:
             # Load extracted data
-            import json
             extracted_dir = Path("extracted_data")
-            
+
             if not extracted_dir.exists():
                 raise FileNotFoundError("Extracted data not found. Run extract first.")
-            
-            with open(extracted_dir / "pages.json", "r", encoding="utf-8") as f:
-                pages = json.load(f)
-            with open(extracted_dir / "assets.json", "r", encoding="utf-8") as f:
-                assets = json.load(f)
-            with open(extracted_dir / "forms.json", "r", encoding="utf-8") as f:
-                forms = json.load(f)
-            
-            self.extracted_data = {
-                'pages': pages,
-                'assets': assets,
-                'forms': forms
-            }
-            
-            # Process and deploy
-            self.processed_data = self.process_content()
+
+            input_files = [extracted_dir / name
+                           for name in ("pages.json", "assets.json", "forms.json")]
+
+            # Если те же входные файлы уже обрабатывались, берём готовый
+            # результат: dev-цикл deploy_only стоит O(хэш) вместо O(страниц).
+            input_digest = _input_state_digest(input_files)
+            cached = None
+            try:
+                cached = load_json(_PROCESSED_CACHE_FILE)
+            except (OSError, ValueError):
+                pass
+            if (cached and cached.get('version') == _PROCESSOR_VERSION
+                    and cached.get('digest') == input_digest):
+                logger.info("Extracted data unchanged since last processing, reusing cached result.")
+                self.processed_data = cached['data']
+                self.processed_data['assets'] = _decode_cached_assets(
+                    self.processed_data.get('assets', []))
+            else:
+                pages = load_json(extracted_dir / "pages.json")
+                # assets.json легко дорастает до сотен МБ; итерируем его потоково,
+                # пик памяти — один ресурс, а не весь распарсенный список.
+                assets = iter_json_items(extracted_dir / "assets.json")
+                forms = load_json(extracted_dir / "forms.json")
+
+                self.extracted_data = {
+                    'pages': pages,
+                    'assets': assets,
+                    'forms': forms
+                }
+
+                self.processed_data = self.process_content()
+                try:
+                    # content ресурсов — bytes, которые ни orjson, ни json не
+                    # сериализуют; в кэш он уходит base64-строкой.
+                    dump_json(_PROCESSED_CACHE_FILE, {
+                        'version': _PROCESSOR_VERSION,
+                        'digest': input_digest,
+                        'data': {
+                            **self.processed_data,
+                            'assets': _encode_cached_assets(
+                                self.processed_data.get('assets', [])),
+                        },
+                    }, compress=True)
+                except (OSError, TypeError, ValueError) as e:
+                    logger.warning(f"Could not persist processed-data cache: {e}")
+
+            # Deploy
             self.deployment_url = self.deploy_to_google_cloud()
             self.setup_forms()
             self.finalize_migration()
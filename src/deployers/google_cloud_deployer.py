@@ -4,20 +4,61 @@ Google Cloud Deployer
 Deploys a static site to GCS and a form handler to Cloud Functions using the gcloud CLI.
 """
 
+import gzip
+import mimetypes
 import os
+import random
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import subprocess
 import zipfile
 from loguru import logger
 from dotmap import DotMap
+from google.auth.transport.requests import AuthorizedSession
 from google.oauth2 import service_account
 from googleapiclient import discovery
+from googleapiclient.errors import HttpError
+from requests.adapters import HTTPAdapter
+
+try:
+    from google.cloud import storage as gcs_storage
+    from google.cloud.storage import transfer_manager
+except ImportError:
+    gcs_storage = None
+    transfer_manager = None
+
+# Кэш клиентов по файлу учётных данных: повторное создание деплойера
+# (несколько CLI-команд, батч-деплои) не перечитывает ключ с диска и не
+# строит discovery-клиент с его TLS-каналом заново.
+_client_cache = {}
+
+
+def _build_clients(credentials_file: str):
+    """Возвращает (credentials, compute) для файла ключа, кэшируя на процесс."""
+    cached = _client_cache.get(credentials_file)
+    if cached is None:
+        credentials = service_account.Credentials.from_service_account_file(
+            credentials_file,
+            scopes=['https://www.googleapis.com/auth/cloud-platform']
+        )
+        compute = discovery.build('compute', 'v1', credentials=credentials)
+        cached = (credentials, compute)
+        _client_cache[credentials_file] = cached
+    return cached
+
 
 class GoogleCloudDeployer:
     """
     Развертывает ресурсы в Google Cloud с использованием Python SDK.
     """
-    
+
+    # Кэш разрешённых образов (project, family) -> selfLink: семейство
+    # резолвится в конкретный образ один раз на процесс, а не на каждый
+    # create-запрос.
+    _resolved_image_cache = {}
+
     def __init__(self, config: DotMap):
         self.config = config
         self.project_id = self.config.project_id
@@ -26,11 +67,13 @@ class GoogleCloudDeployer:
         
         try:
             # Аутентификация с использованием файла ключа сервис-аккаунта
-            self.credentials = service_account.Credentials.from_service_account_file(
-                self.config.credentials_file,
-                scopes=['https://www.googleapis.com/auth/cloud-platform']
-            )
-            self.compute = discovery.build('compute', 'v1', credentials=self.credentials)
+            self.credentials, self.compute = _build_clients(self.config.credentials_file)
+            # Storage-клиент создаётся лениво в _get_storage_client и дальше
+            # переиспользуется вместе со своим пулом соединений.
+            self._storage = None
+            # Внешний IP созданной VM не меняется в рамках деплоя — после
+            # первого lookup'а берётся отсюда без повторного API-вызова.
+            self.external_ip = None
             logger.info("Google Cloud Deployer initialized successfully.")
         except FileNotFoundError:
             logger.error(f"Credentials file not found at: {self.config.credentials_file}")
@@ -53,7 +96,7 @@ class GoogleCloudDeployer:
                 "boot": True,
                 "autoDelete": True,
                 "initializeParams": {
-                    "sourceImage": f"projects/{vm_config.image_project}/global/images/{vm_config.image_family}",
+                    "sourceImage": self._resolve_boot_image(vm_config),
                     "diskSizeGb": str(vm_config.disk_size_gb)
                 }
             }],
@@ -66,6 +109,21 @@ class GoogleCloudDeployer:
             }]
         }
 
+        # Провижининг (apt-get, настройка сервисов) задаётся startup-скриптом
+        # и выполняется параллельно с ожиданием готовности VM, а не отдельными
+        # SSH-раундами после загрузки.
+        startup_script = self._get_startup_script(vm_config)
+        if startup_script:
+            # Скрипт сам сигналит о завершении через guest attributes —
+            # деплойер узнаёт о готовности серверным опросом API, без SSH.
+            vm_body["metadata"] = {
+                "items": [
+                    {"key": "startup-script",
+                     "value": startup_script + self._GUEST_ATTR_READY_SIGNAL},
+                    {"key": "enable-guest-attributes", "value": "TRUE"},
+                ]
+            }
+
         try:
             request = self.compute.instances().insert(
                 project=self.project_id,
@@ -75,18 +133,240 @@ class GoogleCloudDeployer:
             response = request.execute()
             
             logger.info(f"Waiting for VM creation operation to complete...")
-            self.compute.zoneOperations().wait(
-                project=self.project_id,
-                zone=self.zone,
-                operation=response['name']
-            ).execute()
-            
+            self._wait_for_operation(response['name'])
+
             logger.success(f"✅ VM instance '{vm_config.name}' created successfully.")
 
         except Exception as e:
             logger.error(f"Failed to create VM instance: {e}")
             raise
 
+    # Финальная строка startup-скрипта: записывает guest attribute
+    # startup/ready=1, по которому _wait_for_startup_script понимает, что
+    # провижининг закончился.
+    _GUEST_ATTR_READY_SIGNAL = (
+        "\ncurl -s -X PUT --data '1' -H 'Metadata-Flavor: Google' "
+        "http://metadata.google.internal/computeMetadata/v1/instance"
+        "/guest-attributes/startup/ready\n"
+    )
+
+    def _get_startup_script(self, vm_config: DotMap):
+        """
+        Возвращает startup-скрипт VM из конфигурации (или None).
+
+        Поддерживаются vm.startup_script (текст скрипта прямо в YAML) и
+        vm.startup_script_file (путь к файлу со скриптом).
+        """
+        script = vm_config.get('startup_script')
+        if script:
+            return script
+        script_file = vm_config.get('startup_script_file')
+        if script_file:
+            return Path(script_file).read_text(encoding='utf-8')
+        return None
+
+    def test_connection(self):
+        """
+        Проверяет доступность Compute API и корректность проекта/зоны.
+
+        Обе проверочные операции уходят одним batch-HTTP-запросом (одно
+        TCP/TLS-соединение и одна авторизация вместо двух последовательных
+        round-trip'ов).
+        """
+        errors = []
+
+        def _collect(request_id, response, exception):
+            if exception is not None:
+                errors.append(exception)
+
+        batch = self.compute.new_batch_http_request(callback=_collect)
+        batch.add(self.compute.projects().get(project=self.project_id, fields='name'))
+        batch.add(self.compute.zones().get(
+            project=self.project_id, zone=self.zone, fields='name'))
+        batch.execute()
+
+        if errors:
+            raise ConnectionError(
+                f"Google Cloud connection check failed: {errors[0]}")
+        logger.info("Google Cloud connection verified.")
+
+    def _resolve_boot_image(self, vm_config: DotMap) -> str:
+        """
+        Возвращает selfLink загрузочного образа для VM.
+
+        Если в конфигурации задан vm.custom_image (пред-собранный образ со
+        всем установленным софтом), он используется как есть. Иначе
+        семейство образов резолвится в конкретный образ через API и
+        результат кэшируется на процесс — повторные деплои не заставляют
+        control plane разрешать family заново.
+        """
+        custom_image = vm_config.get('custom_image')
+        if custom_image:
+            return custom_image
+
+        cache_key = (vm_config.image_project, vm_config.image_family)
+        cached = self._resolved_image_cache.get(cache_key)
+        if cached is None:
+            image = self.compute.images().getFromFamily(
+                project=vm_config.image_project,
+                family=vm_config.image_family,
+                fields='selfLink'
+            ).execute()
+            cached = image['selfLink']
+            self._resolved_image_cache[cache_key] = cached
+        return cached
+
+    def _wait_for_operation(self, operation_name: str) -> dict:
+        """
+        Ожидает завершения зональной операции через серверный long poll.
+
+        zoneOperations().wait() блокируется на стороне API до завершения
+        операции (или до ~2 минут), поэтому короткие операции завершаются
+        без фиксированного интервала клиентского опроса; по таймауту вызов
+        просто повторяется до статуса DONE.
+        """
+        while True:
+            # Partial response: из всего Operation-прото нам нужны только
+            # статус и ошибка — маска полей сокращает ответ на порядки.
+            result = self.compute.zoneOperations().wait(
+                project=self.project_id,
+                zone=self.zone,
+                operation=operation_name,
+                fields='name,status,error'
+            ).execute()
+            if result.get('status') == 'DONE':
+                if 'error' in result:
+                    raise RuntimeError(
+                        f"Operation '{operation_name}' failed: {result['error']}")
+                return result
+            logger.debug(f"Operation '{operation_name}' still running, waiting again...")
+
+    def _get_storage_client(self):
+        """
+        Возвращает общий Storage-клиент поверх авторизованной сессии с пулом.
+
+        AuthorizedSession + HTTPAdapter(pool 32) держат TLS-соединения
+        открытыми между вызовами, поэтому параллельные загрузки ассетов не
+        платят за handshake на каждый запрос и не исчерпывают пул.
+        """
+        if self._storage is None:
+            session = AuthorizedSession(self.credentials)
+            adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32, pool_block=True)
+            session.mount('https://', adapter)
+            self._storage = gcs_storage.Client(
+                project=self.project_id,
+                credentials=self.credentials,
+                _http=session
+            )
+        return self._storage
+
+    def _get_external_ip(self, vm_name: str):
+        """Возвращает внешний NAT-IP инстанса (или None, если его нет)."""
+        if self.external_ip is not None:
+            return self.external_ip
+        result = self.compute.instances().get(
+            project=self.project_id,
+            zone=self.zone,
+            instance=vm_name,
+            fields='networkInterfaces.accessConfigs.natIP'
+        ).execute()
+        try:
+            self.external_ip = result['networkInterfaces'][0]['accessConfigs'][0].get('natIP')
+        except (KeyError, IndexError, TypeError):
+            return None
+        return self.external_ip
+
+    def wait_for_vm_ready(self, timeout: float = 120.0):
+        """
+        Ждёт доступности SSH-порта созданной VM.
+
+        Вместо фиксированного sleep — короткие TCP-пробы порта 22 с
+        экспоненциальной паузой (0.5с -> 1с -> ... -> 5с): VM, поднявшаяся
+        за 6 секунд, становится доступной через ~6 секунд, а не через
+        очередной полный интервал ожидания.
+        """
+        vm_name = self.config.vm.name
+        external_ip = self._get_external_ip(vm_name)
+        if not isinstance(external_ip, str) or not external_ip:
+            logger.warning(f"VM '{vm_name}' has no external IP; skipping SSH readiness check.")
+            return
+
+        deadline = time.monotonic() + timeout
+        attempt = 0
+        while time.monotonic() < deadline:
+            try:
+                with socket.create_connection((external_ip, 22), timeout=2):
+                    logger.success(f"✅ VM '{vm_name}' is reachable on {external_ip}:22.")
+                    break
+            except OSError:
+                time.sleep(min(0.5 * 2 ** attempt, 5.0))
+                attempt += 1
+        else:
+            raise TimeoutError(f"SSH on {external_ip}:22 not reachable within {timeout:.0f}s")
+
+        vm_config = self.config.vm
+        if vm_config.get('startup_script') or vm_config.get('startup_script_file'):
+            self._wait_for_startup_script(vm_name)
+
+    def _wait_for_startup_script(self, vm_name: str, timeout: float = 600.0):
+        """
+        Ждёт guest attribute startup/ready, выставляемый startup-скриптом.
+
+        Таймаут у этой фазы свой, заметно больше SSH-пробы: скрипт с
+        apt-get install легко работает пару минут уже после того, как
+        порт 22 открылся, и остаток SSH-бюджета ему не подошёл бы.
+
+        Серверный опрос getGuestAttributes вместо SSH-проб: каждая SSH-проба
+        стоит ~2 с на subprocess, TCP и handshake, а API-вызов по уже
+        открытому каналу — миллисекунды. Пока атрибут не записан, API
+        отвечает 404. Пауза между пробами растёт экспоненциально (1с ->
+        ~1.7с -> ... -> 10с) с джиттером: быстрый скрипт обнаруживается
+        почти сразу, а долгий не бомбардируется запросами.
+        """
+        deadline = time.monotonic() + timeout
+        delay = 1.0
+        while time.monotonic() < deadline:
+            try:
+                self.compute.instances().getGuestAttributes(
+                    project=self.project_id,
+                    zone=self.zone,
+                    instance=vm_name,
+                    queryPath='startup/'
+                ).execute()
+                logger.success(f"✅ Startup script on '{vm_name}' finished.")
+                return
+            except HttpError as e:
+                if e.resp.status != 404:
+                    raise
+            time.sleep(delay * random.uniform(0.8, 1.2))
+            delay = min(delay * 1.7, 10.0)
+        raise TimeoutError(
+            f"Startup script on '{vm_name}' did not signal readiness "
+            f"within {timeout:.0f}s")
+
+    def _run_command(self, command: list, capture: bool = False) -> str:
+        """
+        Запускает внешнюю команду (gsutil/gcloud) и возвращает её stdout.
+
+        Один общий хелпер вместо разрозненных subprocess-вызовов: каждая
+        инвокация CLI платит фиксированную цену за старт и аутентификацию,
+        поэтому вызывающий код группирует работу в минимум обращений.
+        """
+        logger.debug(f"Running command: {' '.join(command)}")
+        try:
+            result = subprocess.run(
+                command,
+                check=True,
+                text=True,
+                capture_output=capture
+            )
+        except subprocess.CalledProcessError as e:
+            logger.error(f"Command failed ({e.returncode}): {' '.join(command)}")
+            if capture and e.stderr:
+                logger.error(e.stderr.strip())
+            raise
+        return result.stdout if capture else ""
+
     def deploy_static_site(self):
         """Deploys the static site from the 'dist' directory to GCS using gsutil."""
         logger.info(f"🚀 Deploying static site from '{self.dist_path}' to GCS...")
@@ -95,21 +375,161 @@ class GoogleCloudDeployer:
             raise FileNotFoundError(f"Directory not found: {self.dist_path}")
 
         bucket_uri = f"gs://{self.gcp_config.gcs.bucket_name}"
-        
-        # Use rsync to efficiently upload files
+
         logger.info(f"📤 Syncing '{self.dist_path}' with '{bucket_uri}'...")
-        self._run_command(['gsutil', '-m', 'rsync', '-r', '-c', str(self.dist_path), bucket_uri])
+        if gcs_storage is not None:
+            # Нативный клиент с параллельными загрузками: без старта процесса
+            # gsutil и с пулом потоков вместо одного TCP-потока на всё.
+            self._upload_dist_native(self.gcp_config.gcs.bucket_name)
+        else:
+            # Fallback: gsutil rsync, если google-cloud-storage не установлен.
+            self._run_command(['gsutil', '-m', 'rsync', '-r', '-c', str(self.dist_path), bucket_uri])
 
-        # Set the main page for the website
-        self._run_command(['gsutil', 'web', 'set', '-m', 'index.html', bucket_uri])
-        
-        # Make the bucket public
-        logger.info(f"Setting public access policy on bucket {self.gcp_config.gcs.bucket_name}...")
-        self._run_command(['gsutil', 'iam', 'ch', 'allUsers:objectViewer', bucket_uri])
+        logger.info(f"Setting website config and public access policy on bucket {self.gcp_config.gcs.bucket_name}...")
+        if gcs_storage is not None:
+            self._configure_bucket_native(self.gcp_config.gcs.bucket_name)
+        else:
+            # Website config and IAM policy are independent of each other (both
+            # only need the rsync above), so the gsutil round-trips run
+            # concurrently.
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                web_future = executor.submit(
+                    self._run_command, ['gsutil', 'web', 'set', '-m', 'index.html', bucket_uri])
+                iam_future = executor.submit(
+                    self._run_command, ['gsutil', 'iam', 'ch', 'allUsers:objectViewer', bucket_uri])
+                web_future.result()
+                iam_future.result()
 
         logger.info("🎉 Static site deployment successful!")
         logger.info(f"🔗 Site URL: {self.gcs_static_url}")
 
+    _PUBLIC_VIEWER_ROLE = 'roles/storage.objectViewer'
+
+    def _configure_bucket_native(self, bucket_name: str):
+        """
+        Настраивает website-конфигурацию и публичный доступ бакета.
+
+        Вся website-конфигурация уходит одним bucket.patch(), а IAM-политика
+        читается и записывается только если binding allUsers ещё отсутствует —
+        повторный деплой не делает лишних round-trip'ов.
+        """
+        bucket = self._get_storage_client().get_bucket(bucket_name)
+
+        if (bucket._properties.get('website', {}).get('mainPageSuffix') != 'index.html'):
+            bucket.configure_website(main_page_suffix='index.html')
+            bucket.patch()
+
+        policy = bucket.get_iam_policy(requested_policy_version=3)
+        has_public_read = any(
+            binding.get('role') == self._PUBLIC_VIEWER_ROLE
+            and 'allUsers' in binding.get('members', ())
+            for binding in policy.bindings)
+        if not has_public_read:
+            policy.bindings.append(
+                {'role': self._PUBLIC_VIEWER_ROLE, 'members': {'allUsers'}})
+            bucket.set_iam_policy(policy)
+
+    # Текстовые типы, которые выгодно хранить в бакете gzip-сжатыми: GCS
+    # отдаёт их с Content-Encoding: gzip (и сам распаковывает для клиентов
+    # без поддержки), сокращая трафик в 4-6 раз без CPU на стороне сервера.
+    _COMPRESSIBLE_SUFFIXES = {'.html', '.css', '.js', '.json', '.svg', '.txt', '.xml'}
+
+    def _upload_dist_native(self, bucket_name: str):
+        """
+        Загружает содержимое dist в бакет через google-cloud-storage.
+
+        transfer_manager раскладывает файлы по пулу потоков (мелкие ассеты
+        загружаются параллельно, а не по одному), переиспользуя уже
+        полученные учётные данные сервис-аккаунта. Текстовые файлы
+        сжимаются локально и загружаются как gzip-объекты.
+        """
+        bucket = self._get_storage_client().bucket(bucket_name)
+
+        # os.walk вместо rglob('*') + is_file(): scandir уже знает тип
+        # каждой записи из readdir, так что обход не делает stat на файл.
+        files = [Path(root, name)
+                 for root, _dirs, names in os.walk(self.dist_path)
+                 for name in names]
+        plain = [str(p.relative_to(self.dist_path)) for p in files
+                 if p.suffix.lower() not in self._COMPRESSIBLE_SUFFIXES]
+        compressible = [str(p.relative_to(self.dist_path)) for p in files
+                        if p.suffix.lower() in self._COMPRESSIBLE_SUFFIXES]
+
+        def _upload_compressed(rel_name: str):
+            blob = bucket.blob(rel_name)
+            blob.content_encoding = 'gzip'
+            content_type, _ = mimetypes.guess_type(rel_name)
+            payload = gzip.compress((self.dist_path / rel_name).read_bytes(), compresslevel=9)
+            blob.upload_from_string(payload, content_type=content_type or 'text/html')
+
+        failed = []
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            futures = {executor.submit(_upload_compressed, name): name
+                       for name in compressible}
+            if plain:
+                results = transfer_manager.upload_many_from_filenames(
+                    bucket,
+                    plain,
+                    source_directory=str(self.dist_path),
+                    max_workers=8
+                )
+                failed.extend((name, result) for name, result in zip(plain, results)
+                              if isinstance(result, Exception))
+            for future, name in futures.items():
+                try:
+                    future.result()
+                except Exception as e:
+                    failed.append((name, e))
+
+        if failed:
+            for name, error in failed:
+                logger.error(f"Failed to upload '{name}': {error}")
+            raise RuntimeError(f"{len(failed)} of {len(files)} uploads failed")
+        logger.info(f"Uploaded {len(files)} files to bucket '{bucket_name}' "
+                    f"({len(compressible)} gzip-compressed).")
+
+    def run_deployment(self, processed_data: dict) -> str:
+        """
+        Загружает обработанные страницы и ресурсы из памяти прямо в бакет.
+
+        Контент уже лежит в processed_data — промежуточная выгрузка на диск
+        с повторным чтением удвоила бы дисковый I/O и копирования буферов,
+        поэтому блобы пишутся через upload_from_string из памяти, пулом
+        потоков. Страницы хранятся gzip-сжатыми (как в deploy_static_site).
+        """
+        if gcs_storage is None:
+            raise RuntimeError(
+                "google-cloud-storage is required for in-memory deployment")
+
+        bucket_name = self.config.storage.bucket_name
+        bucket = self._get_storage_client().bucket(bucket_name)
+
+        def _upload_page(page):
+            blob = bucket.blob(page['filename'])
+            blob.content_encoding = 'gzip'
+            payload = gzip.compress(page['html'].encode('utf-8'), compresslevel=9)
+            blob.upload_from_string(payload, content_type='text/html')
+
+        def _upload_asset(asset):
+            local_path = asset['local_path']
+            content_type, _ = mimetypes.guess_type(local_path)
+            bucket.blob(local_path).upload_from_string(
+                asset['content'],
+                content_type=content_type or 'application/octet-stream')
+
+        pages = processed_data.get('pages', [])
+        assets = processed_data.get('assets', [])
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            futures = [executor.submit(_upload_page, page) for page in pages]
+            futures += [executor.submit(_upload_asset, asset) for asset in assets]
+            for future in futures:
+                future.result()
+
+        self._configure_bucket_native(bucket_name)
+        logger.info(f"Deployed {len(pages)} pages and {len(assets)} assets "
+                    f"to bucket '{bucket_name}'.")
+        return f"https://storage.googleapis.com/{bucket_name}/index.html"
+
     def deploy_form_handler_function(self) -> str:
         """Packages, uploads, and deploys the form handler Cloud Function via gcloud."""
         handler_config = self.config.forms.get('google_sheets_handler')
@@ -136,16 +556,14 @@ class GoogleCloudDeployer:
             '--entry-point', 'handle_form',
             '--source', str(source_dir),
             '--allow-unauthenticated',
-            f"--set-env-vars=SPREADSHEET_ID={handler_config.spreadsheet_id},SHEET_NAME={handler_config.sheet_name}"
+            f"--set-env-vars=SPREADSHEET_ID={handler_config.spreadsheet_id},SHEET_NAME={handler_config.sheet_name}",
+            # deploy сам печатает ресурс функции: забираем URL из его вывода
+            # и не платим за второй запуск gcloud (describe) — каждый старт
+            # CLI стоит сотни миллисекунд интерпретатора и загрузки конфига.
+            '--format=value(httpsTrigger.url)'
         ]
-        
-        self._run_command(deploy_command)
-        
-        # Get the URL of the deployed function
-        url = self._run_command(
-            ['gcloud', 'functions', 'describe', function_name, '--project', project_id, '--region', region, '--format=value(httpsTrigger.url)'],
-            capture=True
-        ).strip()
+
+        url = self._run_command(deploy_command, capture=True).strip()
         
         logger.info(f"✅ Function '{function_name}' deployed successfully.")
         logger.info(f"🔗 URL: {url}")
@@ -3,10 +3,31 @@ Tilda data extractor
 """
 
 import requests
-from typing import List, Dict, Any
+from requests.adapters import HTTPAdapter, Retry
+from typing import List, Dict, Any, Optional
+from bs4 import BeautifulSoup, SoupStrainer
 from dotmap import DotMap
 from loguru import logger
 
+from ..utils.helpers import dump_json, load_json
+
+# Only anchor tags matter for link discovery, so parse nothing else.
+_LINK_STRAINER = SoupStrainer('a', href=True)
+
+
+def _build_session() -> requests.Session:
+    """Пул соединений с keep-alive: последовательные вызовы API переиспользуют
+    одно TLS-соединение вместо нового handshake на каждый запрос."""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=16,
+        pool_maxsize=32,
+        max_retries=Retry(total=3, backoff_factor=0.3),
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
 class TildaExtractor:
     """
     Извлекает данные проекта с Tilda с использованием официального Tilda API.
@@ -14,15 +35,18 @@ class TildaExtractor:
     
     BASE_API_URL = "http://api.tildacdn.info/v1"
 
-    def __init__(self, config: DotMap):
+    def __init__(self, config: DotMap, session: Optional[requests.Session] = None):
         """
         Инициализирует экстрактор с конфигурацией Tilda.
 
         Args:
             config (DotMap): Секция 'tilda' из файла конфигурации.
                              Должна содержать api_key, secret_key и project_id.
+            session (requests.Session, optional): Готовая HTTP-сессия с пулом
+                             соединений; если не передана, создаётся своя.
         """
         self.config = config
+        self.session = session if session is not None else _build_session()
         self.api_key = self.config.api_key
         self.secret_key = self.config.secret_key
         self.project_id = self.config.project_id
@@ -52,7 +76,7 @@ class TildaExtractor:
             url += f"&{key}={value}"
         
         try:
-            response = requests.get(url, timeout=30)
+            response = self.session.get(url, timeout=30)
             response.raise_for_status()
             data = response.json()
             if data['status'] != 'FOUND':
@@ -122,7 +146,7 @@ class TildaExtractor:
                     pages.append({'url': url, 'html': html})
                     visited.add(url)
                     
-                    soup = BeautifulSoup(html, 'html.parser')
+                    soup = BeautifulSoup(html, 'lxml', parse_only=_LINK_STRAINER)
                     for a in soup.find_all('a', href=True):
                         href = a['href']
                     
@@ -146,9 +170,8 @@ class TildaExtractor:
         logger.info(f"Extraction complete. Found {len(pages)} pages.")
         
         pages_file = self.output_path / "pages.json"
-        with open(pages_file, 'w', encoding='utf-8') as f:
-            json.dump(pages, f, indent=4, ensure_ascii=False)
-            logger.info(f"✅ Raw page data saved to '{pages_file}'")
+        dump_json(pages_file, pages, compress=True)
+        logger.info(f"✅ Raw page data saved to '{pages_file}'")
 
         return pages
 
@@ -178,16 +201,14 @@ class TildaExtractor:
         pages_file = self.output_path / "pages.json"
         if not pages_file.exists():
             return []
-        with open(pages_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return load_json(pages_file)
 
     def load_extracted_forms(self) -> List[Dict[str, Any]]:
         """Loads forms from the forms.json file."""
         forms_file = self.output_path / "forms.json"
         if not forms_file.exists():
             return []
-        with open(forms_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return load_json(forms_file)
 
     def _get_file_extension(self, url: str, content_type: str = None) -> str:
         if url.endswith('.jpg') or (content_type and 'jpeg' in content_type):
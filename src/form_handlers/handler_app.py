@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+from flask import Flask, request, jsonify
+from flask_compress import Compress
+import json
+import smtplib
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+import os
+
+app = Flask(__name__)
+# Gzip responses (JSON replies shrink roughly in half on the wire)
+Compress(app)
+
+# Load configuration
+with open('config.json', 'r') as f:
+    config = json.load(f)
+
+def send_sendgrid_email(data, form_config):
+    try:
+        from sendgrid import SendGridAPIClient
+        from sendgrid.helpers.mail import Mail
+        
+        sg = SendGridAPIClient(api_key=config['sendgrid_api_key'])
+        
+        # Create email
+        message = Mail(
+            from_email=config['smtp']['username'],
+            to_emails=form_config.get('email', config['smtp']['username']),
+            subject='New form submission: {name}'.format(name=form_config.get("name", "Contact")),
+            html_content=create_email_body(data, form_config)
+        )
+        
+        response = sg.send(message)
+        return response.status_code == 202
+        
+    except Exception as e:
+        print("SendGrid error: {error}".format(error=e))
+        return False
+
+def send_smtp_email(data, form_config):
+    try:
+        msg = MIMEMultipart()
+        msg['From'] = config['smtp']['username']
+        msg['To'] = form_config.get('email', config['smtp']['username'])
+        msg['Subject'] = 'New form submission: {name}'.format(name=form_config.get("name", "Contact"))
+        
+        body = create_email_body(data, form_config)
+        msg.attach(MIMEText(body, 'html'))
+        
+        server = smtplib.SMTP(config['smtp']['host'], config['smtp']['port'])
+        server.starttls()
+        server.login(config['smtp']['username'], config['smtp']['password'])
+        server.send_message(msg)
+        server.quit()
+        
+        return True
+        
+    except Exception as e:
+        print("SMTP error: {error}".format(error=e))
+        return False
+
+def create_email_body(data, form_config):
+    body = """
+    <html>
+    <body>
+        <h2>New form submission: {name}</h2>
+        <table border="1" cellpadding="5" cellspacing="0">
+            <tr><th>Field</th><th>Value</th></tr>
+    """.format(name=form_config.get('name', 'Contact'))
+    
+    for field in form_config.get('fields', []):
+        field_name = field.get('name', '')
+        field_value = data.get(field_name, '')
+        body += "<tr><td>{field_name}</td><td>{field_value}</td></tr>".format(
+            field_name=field_name, field_value=field_value
+        )
+    
+    body += """
+        </table>
+    </body>
+    </html>
+    """
+    
+    return body
+
+@app.route('/api/form-handler', methods=['POST'])
+def handle_form():
+    try:
+        data = request.form.to_dict()
+        form_type = data.get('form_type', 'contact')
+        
+        # Load form configurations
+        forms_file = 'forms.json'
+        if os.path.exists(forms_file):
+            with open(forms_file, 'r') as f:
+                forms = json.load(f)
+        else:
+            forms = []
+        
+        # Find form configuration
+        form_config = None
+        for form in forms:
+            if form.get('name', '').lower() == form_type.lower():
+                form_config = form
+                break
+        
+        if not form_config:
+            # Use default form configuration
+            form_config = {
+                'name': form_type,
+                'email': config['smtp']['username'],
+                'fields': [],
+                'success_message': 'Form submitted successfully',
+                'error_message': 'An error occurred'
+            }
+        
+        # Validate required fields
+        required_fields = [field['name'] for field in form_config.get('fields', []) if field.get('required')]
+        for field in required_fields:
+            if not data.get(field):
+                return jsonify({'error': 'Field {field} is required'.format(field=field)}), 400
+        
+        # Send email
+        email_sent = False
+        if config['email_service'] == 'sendgrid':
+            email_sent = send_sendgrid_email(data, form_config)
+        else:
+            email_sent = send_smtp_email(data, form_config)
+        
+        if email_sent:
+            return jsonify({'success': True, 'message': form_config.get('success_message', 'Form submitted successfully')})
+        else:
+            return jsonify({'error': 'Failed to send email'}), 500
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/health', methods=['GET'])
+def health_check():
+    return jsonify({'status': 'healthy'})
+
+if __name__ == '__main__':
+    app.run(host='0.0.0.0', port=5000)
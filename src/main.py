@@ -4,11 +4,11 @@ Tilda to Google Cloud Migration Agent (Simple Static Site Version)
 """
 
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-import json
 import requests
 import shutil
-from typing import Dict
+from typing import Dict, TYPE_CHECKING
 import yaml
 from dotmap import DotMap
 
@@ -19,10 +19,14 @@ sys.path.insert(0, str(project_root))
 import click
 from loguru import logger
 
+from src.utils.helpers import load_json
 from src.utils.logger import setup_logging
-from src.extractors.tilda_extractor import TildaExtractor
-from src.processors.content_processor import ContentProcessor
-from src.deployers.google_cloud_deployer import GoogleCloudDeployer
+
+# Subsystems are imported inside the commands that need them: a deploy-only
+# invocation should not pay for the extractor/processor stacks (requests,
+# bs4, PIL, cssutils) at startup, and `--help` should not pay for any of them.
+if TYPE_CHECKING:
+    from src.processors.content_processor import ContentProcessor
 
 
 @click.group()
@@ -46,7 +50,7 @@ def _load_config_and_logging(config_path: str):
     setup_logging(level=cfg.logging.level)
     return cfg
 
-def _download_assets_recursively(assets_to_download: Dict, cfg: DotMap, dist_path: Path, processor: ContentProcessor):
+def _download_assets_recursively(assets_to_download: Dict, cfg: DotMap, dist_path: Path, processor: "ContentProcessor"):
     """Downloads assets, searching for new assets within downloaded CSS files."""
     download_queue = set(assets_to_download.keys())
     processed_urls = set()
@@ -92,6 +96,8 @@ def _download_assets_recursively(assets_to_download: Dict, cfg: DotMap, dist_pat
 def extract(config):
     """Extracts data from Tilda and saves it locally."""
     try:
+        from src.extractors.tilda_extractor import TildaExtractor
+
         cfg = _load_config_and_logging(config)
         logger.info("2️⃣ Extracting data from Tilda...")
         extractor = TildaExtractor(cfg.tilda)
@@ -108,6 +114,8 @@ def extract(config):
 def process(config, form_handler_url):
     """Processes extracted data and prepares it for deployment in `dist/`."""
     try:
+        from src.processors.content_processor import ContentProcessor
+
         cfg = _load_config_and_logging(config)
         if form_handler_url:
             logger.info(f"Using form handler URL: {form_handler_url}")
@@ -122,9 +130,9 @@ def process(config, form_handler_url):
             logger.error(f"❌ Pages data not found at '{pages_path}'. Please run 'extract' first.")
             sys.exit(1)
             
-        with open(pages_path, 'r') as f:
-            pages = json.load(f)
-            
+        pages = load_json(pages_path)
+
+
         processor = ContentProcessor(cfg.processing, form_handler_url)
         processed_pages = processor.process_pages(pages)
         assets_to_download = processor.get_asset_mapping()
@@ -134,11 +142,17 @@ def process(config, form_handler_url):
             shutil.rmtree(dist_path)
         dist_path.mkdir(exist_ok=True)
         
-        for page in processed_pages:
-             page_path = dist_path / page['filename']
-             page_path.parent.mkdir(parents=True, exist_ok=True)
-             with open(page_path, 'w', encoding='utf-8') as f:
-                 f.write(page['html'])
+        # Create all parent directories up front (once per distinct dir, no
+        # EEXIST races), then fan the I/O-bound page writes out to threads:
+        # write syscalls release the GIL, so small-file writes overlap.
+        for parent in {(dist_path / page['filename']).parent for page in processed_pages}:
+            parent.mkdir(parents=True, exist_ok=True)
+
+        def _write_page(page):
+            (dist_path / page['filename']).write_text(page['html'], encoding='utf-8')
+
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            list(executor.map(_write_page, processed_pages))
         logger.info(f"✅ Processed pages saved to '{dist_path}'")
                  
         logger.info(f"Downloading assets recursively...")
@@ -154,6 +168,8 @@ def process(config, form_handler_url):
 def deploy_handler(config):
     """Deploys the form handler to Google Cloud Functions."""
     try:
+        from src.deployers.google_cloud_deployer import GoogleCloudDeployer
+
         cfg = _load_config_and_logging(config)
         logger.info("4️⃣ Deploying form handler to Google Cloud Functions...")
         deployer = GoogleCloudDeployer(cfg)
@@ -171,6 +187,8 @@ def deploy_handler(config):
 def deploy_static(config):
     """Deploys the processed files from `dist/` to Google Cloud Storage."""
     try:
+        from src.deployers.google_cloud_deployer import GoogleCloudDeployer
+
         cfg = _load_config_and_logging(config)
         logger.info("5️⃣ Deploying to Google Cloud Storage...")
         deployer = GoogleCloudDeployer(cfg)
@@ -187,15 +205,24 @@ def migrate(config):
     """Run the full migration process: Extract -> Deploy Handler -> Process -> Deploy Static."""
     ctx = click.get_current_context()
     try:
-        # 1. Extract
-        logger.info("\n--- Running Step 1: Extract ---")
-        ctx.invoke(extract, config=config)
-
-        # 2. Deploy Handler
-        logger.info("\n--- Running Step 2: Deploy Form Handler ---")
+        from src.deployers.google_cloud_deployer import GoogleCloudDeployer
+
+        # 1 + 2. Extract and Deploy Handler run in parallel: extraction only
+        # talks to Tilda, the handler deploy only talks to Google Cloud, and
+        # neither needs the other's output until the Process step.
+        # Logging is configured here, in the main thread, before the worker
+        # starts: the nested _load_config_and_logging inside ctx.invoke then
+        # hits setup_logging's already-configured guard instead of racing
+        # through remove()/add() from two threads.
+        logger.info("\n--- Running Steps 1+2: Extract + Deploy Form Handler (parallel) ---")
         cfg = _load_config_and_logging(config)
-        deployer = GoogleCloudDeployer(cfg)
-        form_url = deployer.deploy_form_handler_function()
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            extract_future = executor.submit(ctx.invoke, extract, config=config)
+
+            deployer = GoogleCloudDeployer(cfg)
+            form_url = deployer.deploy_form_handler_function()
+
+            extract_future.result()
 
         # 3. Process
         logger.info("\n--- Running Step 3: Process ---")
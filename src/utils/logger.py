@@ -7,32 +7,53 @@ from pathlib import Path
 from loguru import logger
 
 
+# Сторожок повторной настройки: remove()+add() не атомарны, и два потока,
+# прошедшие через них одновременно (migrate вызывает setup_logging и в главном
+# потоке, и внутри ctx.invoke(extract) в воркере), могут оставить задвоенные
+# синки. Повторный вызов — no-op.
+_configured = False
+
+
 def setup_logging(log_file: str = "logs/migration.log", level: str = "INFO"):
     """Setup logging configuration"""
-    
+    global _configured
+    if _configured:
+        logger.debug("Logging already configured; skipping re-initialization.")
+        return
+    _configured = True
+
     # Create logs directory
     log_path = Path(log_file)
     log_path.parent.mkdir(parents=True, exist_ok=True)
-    
+
     # Remove default handler
     logger.remove()
     
     # Add console handler
+    # backtrace/diagnose off: the verbose traceback machinery is the costly
+    # part of loguru's exception path and is not needed outside debugging.
     logger.add(
         sys.stdout,
         format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
         level=level,
-        colorize=True
+        colorize=True,
+        backtrace=False,
+        diagnose=False
     )
-    
+
     # Add file handler
+    # enqueue=True formats and writes records in a background thread, so
+    # per-page log calls on the hot path do not block on file I/O.
     logger.add(
         log_file,
         format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}",
         level=level,
         rotation="10 MB",
         retention="7 days",
-        compression="zip"
+        compression="zip",
+        enqueue=True,
+        backtrace=False,
+        diagnose=False
     )
     
     logger.info(f"Logging configured - level: {level}, file: {log_file}")
@@ -18,7 +18,7 @@ class TestApiTildaExtractor(unittest.TestCase):
         self.config = load_config('config.example.yaml')
         self.extractor = TildaExtractor(self.config.tilda)
 
-    @patch('src.extractors.tilda_extractor.requests.get')
+    @patch('src.extractors.tilda_extractor.requests.Session.get')
     def test_get_pages_list_success(self, mock_get):
         """
         Тестирует успешное получение списка страниц проекта.
@@ -45,7 +45,7 @@ class TestApiTildaExtractor(unittest.TestCase):
         self.assertEqual(pages[0]['title'], 'Home')
         mock_get.assert_called_once() # Проверяем, что был сделан один запрос
 
-    @patch('src.extractors.tilda_extractor.requests.get')
+    @patch('src.extractors.tilda_extractor.requests.Session.get')
     def test_get_page_full_export_success(self, mock_get):
         """
         Тестирует успешное получение полного экспорта одной страницы.
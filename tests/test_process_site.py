@@ -0,0 +1,49 @@
+import time
+import unittest
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scripts.process_site import LINK_RE, SCRIPT_SRC_RE
+
+
+class TestProcessSiteRegexes(unittest.TestCase):
+
+    def test_script_regex_matches_tilda_script(self):
+        html = b'<script src="https://static.tildacdn.com/js/tilda-x.js"></script>'
+        match = SCRIPT_SRC_RE.search(html)
+        self.assertIsNotNone(match)
+        self.assertIn(b'tildacdn', match.group(1))
+
+    def test_link_regex_matches_quoted_attributes(self):
+        html = b'<link rel="stylesheet" href="css/style.css">'
+        match = LINK_RE.search(html)
+        self.assertIsNotNone(match)
+        self.assertEqual(match.group(2), b'css/style.css')
+
+    def test_link_regex_linear_on_unclosed_tag_flood(self):
+        """
+        Поток незакрытых тегов <link href= без кавычек не должен приводить
+        к квадратичному повторному сканированию остатка документа.
+        """
+        pathological = b'<link href=' * 22000
+        start = time.monotonic()
+        LINK_RE.sub(lambda m: m.group(0), pathological)
+        elapsed = time.monotonic() - start
+        self.assertLess(elapsed, 1.0)
+
+    def test_script_regex_linear_on_pathological_input(self):
+        """
+        Длинный тег <script a=b a=b ...> без закрывающего </script> не должен
+        приводить к катастрофическому бэктрекингу.
+        """
+        pathological = b'<script ' + b'a=b ' * 10000 + b'x'
+        start = time.monotonic()
+        SCRIPT_SRC_RE.search(pathological)
+        elapsed = time.monotonic() - start
+        self.assertLess(elapsed, 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()